@@ -16,6 +16,7 @@ Usage:
 Examples:
   closeout_demo
   closeout_demo closeout.json
+  closeout_demo -              (JSON to stdout; summary goes to stderr)
 
 Hardening:
   - No silent success: prints decision + failures/missing_data counts.
@@ -35,18 +36,17 @@ static std::string default_out_path() {
   return "closeout.json";
 }
 
-static int print_result_and_return(const lift::GateResult& gr) {
-  std::cout << "GateDecision: ";
-  switch (gr.decision) {
-    case lift::GateDecision::Go:        std::cout << "Go"; break;
-    case lift::GateDecision::NoGo:      std::cout << "NoGo"; break;
-    case lift::GateDecision::NeedsData: std::cout << "NeedsData"; break;
-    default:                            std::cout << "NeedsData"; break;
-  }
-  std::cout << "\n";
-  std::cout << "Failed gates: " << gr.failed_gates.size() << "\n";
-  std::cout << "Missing data: " << gr.missing_data.size() << "\n";
-  if (!gr.notes.empty()) std::cout << "Notes: " << gr.notes << "\n";
+// "-" means: write JSON to stdout so a caller can consume it from the pipe
+// without a write-to-disk + read-back round trip.
+static bool is_stdout_path(const std::string& p) {
+  return p == "-";
+}
+
+static int print_result_and_return(const lift::GateResult& gr, std::ostream& os) {
+  os << "GateDecision: " << lift::to_string(gr.decision) << "\n";
+  os << "Failed gates: " << gr.failed_gates.size() << "\n";
+  os << "Missing data: " << gr.missing_data.size() << "\n";
+  if (!gr.notes.empty()) os << "Notes: " << gr.notes << "\n";
 
   // Non-zero on NoGo to make CI-friendly.
   if (gr.decision == lift::GateDecision::NoGo) return 2;
@@ -190,11 +190,22 @@ int main(int argc, char** argv) {
 
   lift::finalize_and_evaluate(r, opt);
 
+  if (is_stdout_path(out_path)) {
+    // Keep stdout pure JSON; human-readable summary goes to stderr.
+    lift::write_closeout_json(r, std::cout, 2);
+    std::cout.flush();
+    if (!std::cout) {
+      std::cerr << "ERROR: failed to write JSON to stdout\n";
+      return 10;
+    }
+    return print_result_and_return(r.gate_result, std::cerr);
+  }
+
   if (!lift::write_closeout_json_file(r, out_path, 2)) {
     std::cerr << "ERROR: failed to write JSON to: " << out_path << "\n";
     return 10;
   }
 
   std::cout << "Wrote: " << out_path << "\n";
-  return print_result_and_return(r.gate_result);
+  return print_result_and_return(r.gate_result, std::cout);
 }
@@ -46,9 +46,6 @@ struct CloseoutEvalOptions {
   bool derive_payload_mass_from_baseline_ratio = true;
 };
 
-// Helper: NaN => unset
-bool is_set(double x);
-
 // 1) Mass delta: sum items, compute resulting mass, compute resulting payload ratio.
 void finalize_mass_delta(MassDeltaBreakdown& md, const CloseoutEvalOptions& opt);
 
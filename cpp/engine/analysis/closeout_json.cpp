@@ -7,21 +7,43 @@ FILE: cpp/engine/analysis/closeout_json.cpp
 
 #include "engine/analysis/closeout_json.hpp"
 
-#include <cmath>
+#include <atomic>
+#include <filesystem>
 #include <fstream>
+#include <locale>
+#include <ostream>
 #include <sstream>
+#include <system_error>
 #include <vector>
 
+#ifdef _WIN32
+#include <process.h>
+#else
+#include <unistd.h>
+#endif
+
 namespace lift {
 
-static inline bool is_set(double x) {
-  return std::isfinite(x);
+static inline bool needs_escape(char c) {
+  return c == '"' || c == '\\' || static_cast<unsigned char>(c) < 0x20;
 }
 
-static std::string json_escape(const std::string& s) {
-  std::ostringstream o;
+// Write `s` as a quoted JSON string directly into `o`.
+// Unescaped runs are copied with a single write() each, so strings with
+// nothing to escape (keys, most notes) cost one scan + one write, with no
+// per-char stream inserts and no temporary ostringstream.
+// Control chars use the full 4-digit form (\u00XX).
+static void json_escape(std::ostream& o, const std::string& s) {
+  static const char kHex[] = "0123456789ABCDEF";
+
   o << '"';
-  for (char c : s) {
+  std::size_t run_start = 0;
+  for (std::size_t i = 0; i < s.size(); ++i) {
+    const char c = s[i];
+    if (!needs_escape(c)) continue;
+
+    o.write(s.data() + run_start, static_cast<std::streamsize>(i - run_start));
+    run_start = i + 1;
     switch (c) {
       case '\\': o << "\\\\"; break;
       case '"':  o << "\\\""; break;
@@ -30,22 +52,60 @@ static std::string json_escape(const std::string& s) {
       case '\n': o << "\\n";  break;
       case '\r': o << "\\r";  break;
       case '\t': o << "\\t";  break;
-      default:
-        if (static_cast<unsigned char>(c) < 0x20) {
-          o << "\\u"
-            << std::hex << std::uppercase
-            << static_cast<int>(static_cast<unsigned char>(c));
-        } else {
-          o << c;
-        }
+      default: {
+        const unsigned char u = static_cast<unsigned char>(c);
+        const char esc[6] = {'\\', 'u', '0', '0', kHex[u >> 4], kHex[u & 0x0F]};
+        o.write(esc, 6);
+      }
     }
   }
+  o.write(s.data() + run_start, static_cast<std::streamsize>(s.size() - run_start));
   o << '"';
-  return o.str();
 }
 
+// Puts a caller-supplied stream into a known formatting state (default
+// flags, no width/fill, classic "C" locale) for the duration of emission,
+// and restores the caller's state afterwards. Output is then independent
+// of whatever the stream was configured for (hex, showpos, scientific,
+// locale digit grouping, ...).
+class StreamStateGuard {
+ public:
+  explicit StreamStateGuard(std::ostream& os)
+      : os_(os),
+        flags_(os.flags()),
+        precision_(os.precision()),
+        width_(os.width()),
+        fill_(os.fill()),
+        locale_(os.imbue(std::locale::classic())) {
+    os_.flags(std::ios::fmtflags{});
+    os_.width(0);
+    os_.fill(' ');
+  }
+
+  ~StreamStateGuard() {
+    os_.imbue(locale_);
+    os_.fill(fill_);
+    os_.width(width_);
+    os_.precision(precision_);
+    os_.flags(flags_);
+  }
+
+  StreamStateGuard(const StreamStateGuard&) = delete;
+  StreamStateGuard& operator=(const StreamStateGuard&) = delete;
+
+ private:
+  std::ostream& os_;
+  std::ios::fmtflags flags_;
+  std::streamsize precision_;
+  std::streamsize width_;
+  char fill_;
+  std::locale locale_;
+};
+
+// Emits straight into the caller's stream (file, stdout, or string buffer),
+// so the report never has to be fully materialized before it is written.
 struct J {
-  std::ostringstream out;
+  std::ostream& out;
   int indent = 2;
   int level = 0;
 
@@ -60,18 +120,19 @@ struct J {
   void arr_end()   { level--; nl(); out << "]"; }
 
   void key(const std::string& k) {
-    out << json_escape(k) << ": ";
+    json_escape(out, k);
+    out << ": ";
   }
 
   void comma() { out << ","; }
 
-  void str(const std::string& v) { out << json_escape(v); }
+  void str(const std::string& v) { json_escape(out, v); }
   void b(bool v) { out << (v ? "true" : "false"); }
   void n_null() { out << "null"; }
 
   void num(double v) {
     if (!is_set(v)) { n_null(); return; }
-    out.setf(std::ios::fixed);
+    out.setf(std::ios::fixed, std::ios::floatfield);
     out.precision(6);
     out << v;
   }
@@ -95,15 +156,6 @@ static const char* concept_name(VariantConcept c) {
   }
 }
 
-static const char* decision_name(GateDecision d) {
-  switch (d) {
-    case GateDecision::Go: return "Go";
-    case GateDecision::NoGo: return "NoGo";
-    case GateDecision::NeedsData: return "NeedsData";
-    default: return "NeedsData";
-  }
-}
-
 static void emit_mass_delta(J& j, const MassDeltaBreakdown& md) {
   j.obj_begin(); j.nl();
 
@@ -253,7 +305,7 @@ static void emit_gates(J& j, const GoNoGoGates& g) {
 
 static void emit_gate_result(J& j, const GateResult& g) {
   j.obj_begin(); j.nl();
-  j.key("decision"); j.str(decision_name(g.decision)); j.comma(); j.nl();
+  j.key("decision"); j.str(to_string(g.decision)); j.comma(); j.nl();
 
   j.key("failed_gates"); j.arr_begin();
   for (size_t i = 0; i < g.failed_gates.size(); ++i) {
@@ -273,10 +325,12 @@ static void emit_gate_result(J& j, const GateResult& g) {
   j.obj_end();
 }
 
-std::string closeout_to_json(const CloseoutReport& r, int indent_spaces) {
-  J j;
-  j.indent = indent_spaces;
-  j.level = 0;
+void write_closeout_json(const CloseoutReport& r,
+                         std::ostream& os,
+                         int indent_spaces) {
+  const StreamStateGuard guard(os);
+
+  J j{os, indent_spaces, 0};
 
   j.obj_begin(); j.nl();
 
@@ -300,16 +354,113 @@ std::string closeout_to_json(const CloseoutReport& r, int indent_spaces) {
 
   j.obj_end();
   j.out << "\n";
-  return j.out.str();
+}
+
+std::string closeout_to_json(const CloseoutReport& r, int indent_spaces) {
+  std::ostringstream o;
+  write_closeout_json(r, o, indent_spaces);
+  return o.str();
+}
+
+namespace fs = std::filesystem;
+
+static long current_pid() {
+#ifdef _WIN32
+  return static_cast<long>(_getpid());
+#else
+  return static_cast<long>(getpid());
+#endif
+}
+
+// Follow symlinks so the rename replaces the link's target (matching the old
+// write-through behavior) instead of replacing the link with a regular file.
+// Works for dangling links too. Returns an empty path on error.
+static fs::path resolve_write_target(const std::string& file_path, std::error_code& ec) {
+  fs::path p(file_path);
+  for (int hops = 0; hops < 40; ++hops) {
+    const fs::file_status st = fs::symlink_status(p, ec);
+    if (st.type() == fs::file_type::none) return {};  // real stat error
+    ec.clear();                                        // not_found is fine
+    if (!fs::is_symlink(st)) return p;
+
+    const fs::path link = fs::read_symlink(p, ec);
+    if (ec) return {};
+    p = link.is_absolute() ? link : p.parent_path() / link;
+  }
+  ec = std::make_error_code(std::errc::too_many_symbolic_link_levels);
+  return {};
+}
+
+// Unique per process (pid) and per call (counter), in the target's directory
+// so the final rename stays on one filesystem.
+static fs::path unique_temp_sibling(const fs::path& target) {
+  static std::atomic<unsigned long> counter{0};
+  std::ostringstream name;
+  name << target.filename().string() << ".tmp."
+       << current_pid() << "." << counter.fetch_add(1);
+  return target.parent_path() / name.str();
+}
+
+// Open `path` and write into it (the pre-atomic behavior). Used for temp
+// files and for targets that must not be replaced (devices, FIFOs, pipes).
+static bool write_through(const CloseoutReport& r,
+                          const fs::path& path,
+                          int indent_spaces) {
+  std::ofstream f(path, std::ios::out | std::ios::trunc);
+  if (!f.is_open()) return false;
+  write_closeout_json(r, f, indent_spaces);
+  f.close();
+  return static_cast<bool>(f);
+}
+
+// Temp + rename is only safe for a regular file, or for a path that does not
+// exist yet. Anything else (char/block device, FIFO, socket, /dev/stdout on a
+// pipe whose /proc link resolves to "pipe:[N]") is written through in place.
+static bool use_atomic_replace(const std::string& file_path, const fs::path& target) {
+  std::error_code ec;
+  const fs::file_status via_path = fs::status(file_path, ec);    // follows links
+  const fs::file_status at_target = fs::symlink_status(target, ec);
+
+  if (!fs::exists(via_path)) {
+    return at_target.type() == fs::file_type::not_found;
+  }
+  if (!fs::is_regular_file(via_path) || !fs::is_regular_file(at_target)) {
+    return false;
+  }
+  // Guard against magic links whose readlink text is not the real file.
+  const bool same = fs::equivalent(file_path, target, ec);
+  return !ec && same;
 }
 
 bool write_closeout_json_file(const CloseoutReport& r,
                               const std::string& file_path,
                               int indent_spaces) {
-  std::ofstream f(file_path, std::ios::out | std::ios::trunc);
-  if (!f.is_open()) return false;
-  f << closeout_to_json(r, indent_spaces);
-  f.close();
+  std::error_code ec;
+  const fs::path target = resolve_write_target(file_path, ec);
+  if (ec || !use_atomic_replace(file_path, target)) {
+    return write_through(r, file_path, indent_spaces);
+  }
+
+  // Regular (or new) file: write a unique sibling temp file, then rename
+  // over the target so readers never observe a partially written report.
+  const fs::path tmp_path = unique_temp_sibling(target);
+  if (!write_through(r, tmp_path, indent_spaces)) {
+    fs::remove(tmp_path, ec);
+    return false;
+  }
+
+  // Keep an existing report's permission bits (best effort; ownership is not
+  // preserved since the rename installs a new file).
+  const fs::file_status target_st = fs::status(target, ec);
+  if (!ec && fs::is_regular_file(target_st)) {
+    fs::permissions(tmp_path, target_st.permissions(), ec);
+  }
+
+  fs::rename(tmp_path, target, ec);
+  if (ec) {
+    fs::remove(tmp_path, ec);
+    return false;
+  }
   return true;
 }
 
@@ -17,14 +17,33 @@ Hardening:
 
 #include "engine/analysis/closeout_types.hpp"
 
+#include <iosfwd>
 #include <string>
 
 namespace lift {
 
+// Stream CloseoutReport as JSON into `os` (no intermediate string).
+// Output is byte-identical to closeout_to_json regardless of the stream's
+// prior flags/precision/width/fill/locale; that state is restored on return.
+void write_closeout_json(const CloseoutReport& r,
+                         std::ostream& os,
+                         int indent_spaces = 2);
+
 // Serialize CloseoutReport to JSON string.
 std::string closeout_to_json(const CloseoutReport& r, int indent_spaces = 2);
 
 // Write JSON to a file path. Returns true on success, false on failure.
+// Regular file / new path: atomic replace. Writes a unique sibling
+// "<name>.tmp.<pid>.<n>", then renames it onto the target, so concurrent
+// readers/writers never see a torn report.
+//  - Symlinks are followed: the link's target is replaced, the link is kept.
+//  - Hard links are broken: other names for the old file keep the old bytes.
+//  - An existing file's permission bits are kept; owner/group are not (the
+//    rename installs a new file owned by the writer).
+//  - Not durable: the temp file is not fsync'd before the rename, so after a
+//    crash/power loss the report may be empty or missing.
+// Any other existing target (device such as /dev/null, FIFO, socket,
+// /dev/stdout on a pipe) is opened and written in place, never replaced.
 bool write_closeout_json_file(const CloseoutReport& r,
                               const std::string& file_path,
                               int indent_spaces = 2);
@@ -24,7 +24,9 @@ Hardening rules:
   - No hidden defaults that could accidentally "pass" a design.
 
 Note:
-  This header defines *types only*. Computation happens in closeout_eval.*.
+  This header defines types plus trivial inline helpers shared by eval and
+  JSON export (is_set, to_string(GateDecision)). Computation happens in
+  closeout_eval.*.
 ================================================================================
 */
 
@@ -39,6 +41,12 @@ namespace lift {
 // Sentinel for "unset" numeric values (NaN by default).
 inline constexpr double kUnset = std::numeric_limits<double>::quiet_NaN();
 
+// Single source for "is this numeric field set?" (eval gates + JSON null).
+// Set means finite: NaN (kUnset) and +/-inf are both treated as unset.
+inline bool is_set(double x) {
+  return std::isfinite(x);
+}
+
 enum class VariantConcept : int {
   Unknown = 0,
   Quad_OpenRotor,
@@ -58,6 +66,16 @@ enum class GateDecision : int {
   NeedsData = 2
 };
 
+// Single source for decision labels (JSON export, CLI output).
+inline const char* to_string(GateDecision d) {
+  switch (d) {
+    case GateDecision::Go: return "Go";
+    case GateDecision::NoGo: return "NoGo";
+    case GateDecision::NeedsData: return "NeedsData";
+    default: return "NeedsData";
+  }
+}
+
 struct MassDeltaItem {
   // Example categories: "motors", "escs", "props", "mounts", "wiring", "structure",
   // "fairings", "bearings", "shafts", "gearbox", "gimbals", "cooling", etc.
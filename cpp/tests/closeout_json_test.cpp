@@ -0,0 +1,255 @@
+/*
+================================================================================
+Closeout JSON — Stream-state independence test
+FILE: cpp/tests/closeout_json_test.cpp
+
+Purpose:
+  - json_escape pins: control chars as \u00XX, quote/backslash escaped,
+    non-ASCII UTF-8 bytes passed through unchanged.
+  - write_closeout_json must emit the same bytes as closeout_to_json no matter
+    how the caller's stream is configured (flags, width/fill, locale).
+  - The caller's stream state must be restored afterwards.
+  - write_closeout_json_file (POSIX): atomic replace for regular/new files,
+    symlinks followed (relative, chained, dangling), permission bits kept,
+    FIFOs written through (not replaced), no temp files left behind.
+
+Exit code 0 on success, 1 on any failure (CTest-friendly).
+
+Build note:
+  Registered with CTest, but the tree does not configure/build under C++20
+  yet (missing cpp/cli/main.cpp; `concept` member in closeout_types.hpp).
+  Build manually against the engine sources with -std=c++17, e.g.:
+    g++ -std=c++17 -Icpp cpp/tests/closeout_json_test.cpp \
+        cpp/engine/analysis/closeout_json.cpp -o closeout_json_test
+================================================================================
+*/
+
+#include "engine/analysis/closeout_json.hpp"
+
+#include <filesystem>
+#include <fstream>
+#include <iostream>
+#include <iterator>
+#include <locale>
+#include <sstream>
+#include <string>
+
+#ifndef _WIN32
+#include <fcntl.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
+namespace {
+
+int g_failures = 0;
+
+void check(bool ok, const std::string& what) {
+  if (!ok) {
+    std::cerr << "FAIL: " << what << "\n";
+    ++g_failures;
+  }
+}
+
+// Grouping with '_' every 3 digits and ',' as decimal point: any leak of the
+// caller's locale into the emitter shows up immediately.
+struct WeirdPunct : std::numpunct<char> {
+  char do_decimal_point() const override { return ','; }
+  char do_thousands_sep() const override { return '_'; }
+  std::string do_grouping() const override { return "\3"; }
+};
+
+lift::CloseoutReport make_report() {
+  lift::CloseoutReport r;
+  r.concept = lift::VariantConcept::Quad_With_SFCS;
+  r.variant_name = "stream_state_test";
+  r.gates.max_delta_mass_kg = 1.5;
+  r.mass_delta.baseline_aircraft_mass_kg = 12345.678;
+  r.mass_delta.items.push_back({"motors", +0.40, "positive"});
+  r.mass_delta.items.push_back({"structure", -0.20, "negative"});
+  r.mass_delta.delta_mass_total_kg = 0.20;
+  r.disk.A_total_m2 = 1.75;
+  return r;
+}
+
+void test_string_escaping() {
+  lift::CloseoutReport r;
+  // \x01, \x1f, quote, backslash, and U+00E9 as UTF-8 (0xC3 0xA9).
+  r.variant_name = "a\x01" "b\x1f" "c\"d\\e\xC3\xA9";
+
+  const std::string json = lift::closeout_to_json(r, 2);
+  const std::string expected =
+      "\"variant_name\": \"a\\u0001b\\u001Fc\\\"d\\\\e\xC3\xA9\",";
+  check(json.find(expected) != std::string::npos,
+        "escaping: variant_name not emitted as " + expected);
+}
+
+void test_matches_string_api_with_hostile_flags() {
+  const lift::CloseoutReport r = make_report();
+  const std::string expected = lift::closeout_to_json(r, 2);
+
+  std::ostringstream os;
+  os.setf(std::ios::scientific | std::ios::showpos | std::ios::hex |
+          std::ios::uppercase | std::ios::showbase | std::ios::left);
+  os.precision(2);
+  os.width(20);
+  os.fill('*');
+
+  lift::write_closeout_json(r, os, 2);
+  check(os.str() == expected, "hostile flags: output differs from closeout_to_json");
+}
+
+void test_matches_string_api_with_custom_locale() {
+  const lift::CloseoutReport r = make_report();
+  const std::string expected = lift::closeout_to_json(r, 2);
+
+  std::ostringstream os;
+  os.imbue(std::locale(std::locale::classic(), new WeirdPunct));
+
+  lift::write_closeout_json(r, os, 2);
+  check(os.str() == expected, "custom locale: output differs from closeout_to_json");
+}
+
+void test_restores_caller_state() {
+  const lift::CloseoutReport r = make_report();
+
+  std::ostringstream os;
+  const std::ios::fmtflags flags = std::ios::scientific | std::ios::showpos;
+  os.flags(flags);
+  os.precision(3);
+  os.fill('#');
+  os.imbue(std::locale(std::locale::classic(), new WeirdPunct));
+
+  lift::write_closeout_json(r, os, 2);
+
+  check(os.flags() == flags, "flags not restored");
+  check(os.precision() == 3, "precision not restored");
+  check(os.fill() == '#', "fill not restored");
+  check(std::use_facet<std::numpunct<char>>(os.getloc()).decimal_point() == ',',
+        "locale not restored");
+}
+
+#ifndef _WIN32
+namespace fs = std::filesystem;
+
+std::string read_file(const fs::path& p) {
+  std::ifstream f(p, std::ios::in | std::ios::binary);
+  return std::string(std::istreambuf_iterator<char>(f), std::istreambuf_iterator<char>());
+}
+
+void write_text(const fs::path& p, const std::string& text) {
+  std::ofstream f(p, std::ios::out | std::ios::trunc);
+  f << text;
+}
+
+bool no_temp_leftovers(const fs::path& dir) {
+  for (const auto& e : fs::recursive_directory_iterator(dir)) {
+    if (e.path().filename().string().find(".tmp.") != std::string::npos) return false;
+  }
+  return true;
+}
+
+void test_file_writes(const fs::path& dir) {
+  const lift::CloseoutReport r = make_report();
+  const std::string expected = lift::closeout_to_json(r, 2);
+  fs::create_directories(dir / "sub");
+
+  // Regular target is replaced with the new report.
+  const fs::path regular = dir / "regular.json";
+  write_text(regular, "old");
+  check(lift::write_closeout_json_file(r, regular.string(), 2), "regular: write failed");
+  check(read_file(regular) == expected, "regular: content mismatch");
+
+  // New path is created.
+  const fs::path fresh = dir / "fresh.json";
+  check(lift::write_closeout_json_file(r, fresh.string(), 2), "new path: write failed");
+  check(read_file(fresh) == expected, "new path: content mismatch");
+
+  // Relative symlink: target updated, link kept.
+  const fs::path target = dir / "sub" / "target.json";
+  const fs::path rel = dir / "sub" / "rel.json";
+  write_text(target, "old");
+  fs::create_symlink("target.json", rel);
+  check(lift::write_closeout_json_file(r, rel.string(), 2), "relative link: write failed");
+  check(fs::is_symlink(rel), "relative link: link was replaced");
+  check(read_file(target) == expected, "relative link: target not updated");
+
+  // Chained symlink (chain -> sub/rel.json -> target.json).
+  const fs::path chain = dir / "chain.json";
+  write_text(target, "old");
+  fs::create_symlink("sub/rel.json", chain);
+  check(lift::write_closeout_json_file(r, chain.string(), 2), "chained link: write failed");
+  check(fs::is_symlink(chain) && fs::is_symlink(rel), "chained link: link was replaced");
+  check(read_file(target) == expected, "chained link: target not updated");
+
+  // Dangling symlink: its target is created, link kept.
+  const fs::path dangling = dir / "dangling.json";
+  const fs::path missing = dir / "missing.json";
+  fs::create_symlink("missing.json", dangling);
+  check(lift::write_closeout_json_file(r, dangling.string(), 2), "dangling link: write failed");
+  check(fs::is_symlink(dangling), "dangling link: link was replaced");
+  check(fs::is_regular_file(missing) && read_file(missing) == expected,
+        "dangling link: target not created");
+
+  // 0640 target keeps its mode across the replace.
+  const fs::path restricted = dir / "restricted.json";
+  write_text(restricted, "old");
+  const fs::perms mode = fs::perms::owner_read | fs::perms::owner_write | fs::perms::group_read;
+  fs::permissions(restricted, mode, fs::perm_options::replace);
+  check(lift::write_closeout_json_file(r, restricted.string(), 2), "0640: write failed");
+  check((fs::status(restricted).permissions() & fs::perms::mask) == mode, "0640: mode not kept");
+  check(read_file(restricted) == expected, "0640: content mismatch");
+
+  // FIFO: written through, never replaced by a regular file. The reader is
+  // opened non-blocking first so the writer's open() does not block; the
+  // report fits in the pipe buffer.
+  const fs::path fifo = dir / "report.fifo";
+  check(::mkfifo(fifo.c_str(), 0600) == 0, "fifo: mkfifo failed");
+  const int rd = ::open(fifo.c_str(), O_RDONLY | O_NONBLOCK);
+  check(rd >= 0, "fifo: open reader failed");
+  if (rd >= 0) {
+    check(lift::write_closeout_json_file(r, fifo.string(), 2), "fifo: write failed");
+    std::string got;
+    char buf[4096];
+    ssize_t n = 0;
+    while ((n = ::read(rd, buf, sizeof(buf))) > 0) got.append(buf, static_cast<std::size_t>(n));
+    ::close(rd);
+    check(fs::is_fifo(fs::symlink_status(fifo)), "fifo: replaced by a regular file");
+    check(got == expected, "fifo: reader did not receive the report");
+  }
+
+  // Missing parent directory fails cleanly.
+  check(!lift::write_closeout_json_file(r, (dir / "nope" / "x.json").string(), 2),
+        "missing dir: write unexpectedly succeeded");
+
+  check(no_temp_leftovers(dir), "temp files left behind");
+}
+
+void test_file_writes_in_temp_dir() {
+  const fs::path dir = fs::temp_directory_path() /
+                       ("closeout_json_test." + std::to_string(::getpid()));
+  std::error_code ec;
+  fs::remove_all(dir, ec);
+  test_file_writes(dir);
+  fs::remove_all(dir, ec);
+}
+#endif
+
+} // namespace
+
+int main() {
+  test_string_escaping();
+  test_matches_string_api_with_hostile_flags();
+  test_matches_string_api_with_custom_locale();
+  test_restores_caller_state();
+#ifndef _WIN32
+  test_file_writes_in_temp_dir();
+#endif
+
+  if (g_failures != 0) {
+    std::cerr << g_failures << " check(s) failed\n";
+    return 1;
+  }
+  std::cout << "closeout_json_test: OK\n";
+  return 0;
+}